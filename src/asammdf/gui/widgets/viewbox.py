@@ -1,11 +1,17 @@
-from functools import partial
+import math
 import weakref
 
-import numpy as np
 import pyqtgraph as pg
 import pyqtgraph.functions as fn
 from PySide6 import QtCore, QtGui, QtWidgets
 
+_LOG_1_02 = math.log(1.02)
+
+## module level copies of the ViewBoxWithCursor mouse modes used in the event handlers
+_PAN_MODE = 3
+_CURSOR_MODE = 2
+_RECT_MODE = 1
+
 
 class ViewBoxMenu(QtWidgets.QMenu):
     pan = "Pan mode"
@@ -35,9 +41,9 @@ class ViewBoxMenu(QtWidgets.QMenu):
         self.leftMenu.addAction(pan)
         self.leftMenu.addAction(cursor)
         # self.leftMenu.addAction(zoom)
-        pan.triggered.connect(partial(self.set_mouse_mode, "pan"))
-        cursor.triggered.connect(partial(self.set_mouse_mode, "cursor"))
-        zoom.triggered.connect(partial(self.set_mouse_mode, "rect"))
+        pan.triggered.connect(self._set_pan_mode)
+        cursor.triggered.connect(self._set_cursor_mode)
+        zoom.triggered.connect(self._set_rect_mode)
 
         pan.setCheckable(True)
         cursor.setCheckable(True)
@@ -50,17 +56,21 @@ class ViewBoxMenu(QtWidgets.QMenu):
 
         self.view().sigStateChanged.connect(self.viewStateChanged)
 
-        self.updateState()
-
     def viewStateChanged(self):
+        ## a hidden menu is only marked as outdated; popup updates it before showing
         self.valid = False
-        self.updateState()
+        if self.isVisible():
+            self.updateState()
 
     def updateState(self):
-        state = self.view().getState(copy=False)
-        if state["mouseMode"] == ViewBoxWithCursor.PanMode:
+        view = self.view()
+        if view is None:
+            return
+
+        mode = view.state["mouseMode"]
+        if mode == _PAN_MODE:
             self.mouseModes[0].setChecked(True)
-        elif state["mouseMode"] == ViewBoxWithCursor.CursorMode:
+        elif mode == _CURSOR_MODE:
             self.mouseModes[1].setChecked(True)
         else:
             self.mouseModes[2].setChecked(True)
@@ -75,12 +85,26 @@ class ViewBoxMenu(QtWidgets.QMenu):
     def set_mouse_mode(self, mode):
         self.view().setLeftButtonAction(mode)
 
+    def _set_pan_mode(self):
+        self.set_mouse_mode("pan")
 
-class ViewBoxWithCursor(pg.ViewBox):
-    PanMode = 3
-    CursorMode = 2
-    RectMode = 1
+    def _set_cursor_mode(self):
+        self.set_mouse_mode("cursor")
+
+    def _set_rect_mode(self):
+        self.set_mouse_mode("rect")
 
+
+class ViewBoxWithCursor(pg.ViewBox):
+    PanMode = _PAN_MODE
+    CursorMode = _CURSOR_MODE
+    RectMode = _RECT_MODE
+
+    ## the payloads are a pyqtgraph MouseDragEvent (sigCursorMoved) and a
+    ## (start, end, zoom) tuple or None (sigZoomChanged, sigZoomFinished), so the
+    ## signals stay typed as object. Always connect them using the bound signal
+    ## attributes (viewbox.sigCursorMoved.connect(slot)), never SIGNAL("...") strings,
+    ## so that no signature normalization is needed when connecting
     sigCursorMoved = QtCore.Signal(object)
     sigZoomChanged = QtCore.Signal(object)
     sigZoomFinished = QtCore.Signal(object)
@@ -106,6 +130,15 @@ class ViewBoxWithCursor(pg.ViewBox):
         ).toCombined(),
     )
 
+    _ZOOM_COMBOS = frozenset((X_zoom, Y_zoom, *XY_zoom))
+
+    _PAN_BUTTONS = frozenset(
+        (
+            QtCore.Qt.MouseButton.LeftButton,
+            QtCore.Qt.MouseButton.MiddleButton,
+        )
+    )
+
     def __init__(self, plot, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -122,6 +155,19 @@ class ViewBoxWithCursor(pg.ViewBox):
         self.plot = plot
 
         self._settings = QtCore.QSettings()
+        self.refresh_settings()
+
+        self._inverse_transform = None
+        self._inverse_linear = None
+        self.sigTransformChanged.connect(self._invalidate_inverse_transform)
+
+        ## cursor moves are coalesced so that a burst of mouse events results in
+        ## a single sigCursorMoved emission with the latest event
+        self._pending_cursor_event = None
+        self._cursor_move_timer = QtCore.QTimer(self)
+        self._cursor_move_timer.setSingleShot(True)
+        self._cursor_move_timer.setInterval(0)
+        self._cursor_move_timer.timeout.connect(self._flush_cursor_move)
 
     def __repr__(self):
         return "ASAM ViewBox"
@@ -155,6 +201,64 @@ class ViewBoxWithCursor(pg.ViewBox):
                 f'graphicsItems:ViewBox:setLeftButtonAction: unknown mode = {mode} (Options are "pan", "cursor" and "rect")'
             )
 
+    def refresh_settings(self):
+        """re-reads the settings used by the mouse and wheel event handlers"""
+        self._zoom_x_center = self._settings.value(
+            "zoom_x_center_on_cursor", True, type=bool
+        )
+
+    def _flush_cursor_move(self):
+        ev, self._pending_cursor_event = self._pending_cursor_event, None
+        if ev is not None:
+            self.sigCursorMoved.emit(ev)
+
+    def _invalidate_inverse_transform(self):
+        self._inverse_transform = None
+        self._inverse_linear = None
+
+    def _inverted_transform(self):
+        """returns the inverted child group transform; it is cached until the view
+        transform changes"""
+        if self._inverse_transform is None:
+            self._inverse_transform = fn.invertQTransform(self.childGroup.transform())
+        return self._inverse_transform
+
+    def _map_delta_to_view(self, dx, dy):
+        """maps a scene delta to a view delta. The translation cancels out for deltas
+        so only the 2x2 linear part of the child group transform is inverted"""
+        if self._inverse_linear is None:
+            tr = self.childGroup.transform()
+            a, b, c, d = tr.m11(), tr.m12(), tr.m21(), tr.m22()
+            det = a * d - b * c
+            if det == 0:
+                ## singular transform (e.g. zero sized view): there is nothing to pan
+                self._inverse_linear = 0.0, 0.0, 0.0, 0.0
+            else:
+                self._inverse_linear = d / det, -b / det, -c / det, a / det
+
+        i11, i12, i21, i22 = self._inverse_linear
+        return i11 * dx + i21 * dy, i12 * dx + i22 * dy
+
+    def _apply_pan_delta(self, dif, use_x, use_y, apply_y):
+        """translates the view by the scene delta *dif* along the axes enabled by
+        *use_x* and *use_y*. If *apply_y* is False only the X axis is panned"""
+        x, y = self._map_delta_to_view(
+            dif.x() if use_x else 0.0,
+            dif.y() if use_y else 0.0,
+        )
+
+        x = x if use_x else None
+        if apply_y:
+            y = y if use_y else None
+        else:
+            ## keep the Y range, but only if there is an X translation
+            y = None if x is None else 0
+
+        self._resetTarget()
+        if x is not None or y is not None:
+            self.translateBy(x=x, y=y)
+        self.sigRangeChangedManually.emit(self.state["mouseEnabled"])
+
     def mouseDragEvent(self, ev, axis=None, ignore_cursor=False):
         ## if axis is specified, event will only affect that axis.
         ev.accept()  ## we accept all buttons
@@ -163,18 +267,23 @@ class ViewBoxWithCursor(pg.ViewBox):
         dif = pos - ev.lastScenePos()
         dif = dif * -1
 
+        state = self.state
+        mouseEnabled = state["mouseEnabled"]
+
         ## Ignore axes if mouse is disabled
-        mouseEnabled = np.array(self.state["mouseEnabled"], dtype=np.float64)
-        mask = mouseEnabled.copy()
-        if axis is not None:
-            mask[1 - axis] = 0.0
+        use_x = axis != 1 and bool(mouseEnabled[0])
+        use_y = axis != 0 and bool(mouseEnabled[1])
 
-        if (
-            self.state["mouseMode"] == ViewBoxWithCursor.CursorMode
-            and not ignore_cursor
-        ):
+        if state["mouseMode"] == _CURSOR_MODE and not ignore_cursor:
             if ev.button() == QtCore.Qt.MouseButton.LeftButton:
-                self.sigCursorMoved.emit(ev)
+                self._pending_cursor_event = ev
+                if ev.isFinish():
+                    ## the last position must be mapped with the current view range,
+                    ## before sigZoomFinished lets the plot change it
+                    self._cursor_move_timer.stop()
+                    self._flush_cursor_move()
+                elif not self._cursor_move_timer.isActive():
+                    self._cursor_move_timer.start()
                 if self.zoom_start is not None:
                     end = self.mapSceneToView(ev.scenePos())
                     self.sigZoomChanged.emit((self.zoom_start, end, self.zoom))
@@ -184,72 +293,50 @@ class ViewBoxWithCursor(pg.ViewBox):
                         self.sigZoomChanged.emit(None)
 
             else:
-                tr = self.childGroup.transform()
-                tr = fn.invertQTransform(tr)
-                tr = tr.map(dif * mask) - tr.map(pg.Point(0, 0))
-
-                x = tr.x() if mask[0] == 1 else None
-
-                self._resetTarget()
-                if x is not None:
-                    self.translateBy(x=x, y=0)
-                self.sigRangeChangedManually.emit(self.state["mouseEnabled"])
+                self._apply_pan_delta(dif, use_x, use_y, apply_y=False)
 
         else:
             ## Scale or translate based on mouse button
-            if ev.button() in [
-                QtCore.Qt.MouseButton.LeftButton,
-                QtCore.Qt.MouseButton.MiddleButton,
-            ]:
-                tr = self.childGroup.transform()
-                tr = fn.invertQTransform(tr)
-                tr = tr.map(dif * mask) - tr.map(pg.Point(0, 0))
-
-                x = tr.x() if mask[0] == 1 else None
-                y = tr.y() if mask[1] == 1 else None
-
-                self._resetTarget()
-                if x is not None or y is not None:
-                    self.translateBy(x=x, y=y)
-                self.sigRangeChangedManually.emit(self.state["mouseEnabled"])
+            if ev.button() in ViewBoxWithCursor._PAN_BUTTONS:
+                self._apply_pan_delta(dif, use_x, use_y, apply_y=True)
 
             elif ev.button() & QtCore.Qt.MouseButton.RightButton:
-                if self.state["aspectLocked"] is not False:
-                    mask[0] = 0
-
-                dif = ev.screenPos() - ev.lastScreenPos()
-                dif = np.array([dif.x(), dif.y()])
-                dif[0] *= -1
-                s = ((mask * 0.02) + 1) ** dif
-
-                tr = self.childGroup.transform()
-                tr = fn.invertQTransform(tr)
-
-                x = s[0] if mouseEnabled[0] == 1 else None
-                y = s[1] if mouseEnabled[1] == 1 else None
-
-                center = pg.Point(
-                    tr.map(ev.buttonDownPos(QtCore.Qt.MouseButton.RightButton))
+                ## the X scale stays 1.0 if the aspect ratio is locked
+                scale_x = use_x and state["aspectLocked"] is False
+
+                dsp = ev.screenPos() - ev.lastScreenPos()
+                if mouseEnabled[0]:
+                    x = 1.02 ** -dsp.x() if scale_x else 1.0
+                else:
+                    x = None
+                if mouseEnabled[1]:
+                    y = 1.02 ** dsp.y() if use_y else 1.0
+                else:
+                    y = None
+
+                ## scaleBy accepts any QPointF as center
+                center = self._inverted_transform().map(
+                    ev.buttonDownPos(QtCore.Qt.MouseButton.RightButton)
                 )
                 self._resetTarget()
                 self.scaleBy(x=x, y=y, center=center)
-                self.sigRangeChangedManually.emit(self.state["mouseEnabled"])
+                self.sigRangeChangedManually.emit(mouseEnabled)
 
     def keyPressEvent(self, ev):
-        if self.zoom_start is None:
+        ## the key combination is only used to start a zoom in cursor mode
+        if self.zoom_start is None and self.state["mouseMode"] == _CURSOR_MODE:
             self.zoom = ev.keyCombination().toCombined()
         ev.ignore()
 
     def keyReleaseEvent(self, ev):
-        if self.zoom_start is None:
+        if self.zoom_start is None and self.zoom is not None:
             self.zoom = None
         ev.ignore()
 
     def mousePressEvent(self, ev):
-        if self.state["mouseMode"] == ViewBoxWithCursor.CursorMode and self.zoom in (
-            self.X_zoom,
-            self.Y_zoom,
-            *self.XY_zoom,
+        if (
+            self.state["mouseMode"] == _CURSOR_MODE
+            and self.zoom in ViewBoxWithCursor._ZOOM_COMBOS
         ):
             self.zoom_start = self.mapSceneToView(ev.scenePos())
 
@@ -264,20 +351,19 @@ class ViewBoxWithCursor(pg.ViewBox):
         self.rbScaleBox.show()
 
     def wheelEvent(self, ev, axis=None):
-        if self.state["mouseMode"] == ViewBoxWithCursor.CursorMode:
-            mask = [True, False]
+        state = self.state
+        mex, mey = state["mouseEnabled"]
+        if state["mouseMode"] == _CURSOR_MODE:
+            mask = (True, False)
+        elif axis == 0:
+            mask = (mex, False)
+        elif axis == 1:
+            mask = (False, mey)
         else:
-            if axis in (0, 1):
-                mask = [False, False]
-                mask[axis] = self.state["mouseEnabled"][axis]
-            else:
-                mask = self.state["mouseEnabled"][:]
+            mask = (mex, mey)
 
-        if (
-            self._settings.value("zoom_x_center_on_cursor", True, type=bool)
-            and self.cursor is not None
-            and self.cursor.isVisible()
-        ):
+        cursor = self.cursor
+        if self._zoom_x_center and cursor is not None and cursor.isVisible():
             x_range, _ = self.viewRange()
             delta = x_range[1] - x_range[0]
 
@@ -287,22 +373,22 @@ class ViewBoxWithCursor(pg.ViewBox):
 
             step = -delta * event_delta
 
-            pos = self.cursor.value()
+            pos = cursor.value()
             x_range = pos - delta / 2, pos + delta / 2
             self.setXRange(x_range[0] - step, x_range[1] + step, padding=0)
 
         else:
             pos = ev.pos()
 
-            s = 1.02 ** (
-                ev.delta() * self.state["wheelScaleFactor"]
-            )  # actual scaling factor
+            # actual scaling factor 1.02 ** (delta * wheelScaleFactor)
+            s = math.exp(ev.delta() * state["wheelScaleFactor"] * _LOG_1_02)
+            sx = None if mask[0] is False else s
+            sy = None if mask[1] is False else s
 
-            s = [(None if m is False else s) for m in mask]
-            center = pg.Point(fn.invertQTransform(self.childGroup.transform()).map(pos))
+            center = self._inverted_transform().map(pos)
 
             self._resetTarget()
-            self.scaleBy(s, center)
+            self.scaleBy((sx, sy), center)
 
         ev.accept()
         self.sigRangeChangedManually.emit(mask)
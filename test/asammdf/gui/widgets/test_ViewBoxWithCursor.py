@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+from test.asammdf.gui.test_base import TestBase
+
+import pyqtgraph.functions as fn
+from PySide6 import QtCore, QtGui
+
+from asammdf.gui.widgets.viewbox import ViewBoxWithCursor
+
+
+class DragEvent:
+    """
+    Minimal stand-in for pyqtgraph's MouseDragEvent.
+    """
+
+    def __init__(
+        self,
+        scene_pos,
+        last_scene_pos,
+        finish=False,
+        button=QtCore.Qt.MouseButton.LeftButton,
+    ):
+        self._scene_pos = scene_pos
+        self._last_scene_pos = last_scene_pos
+        self._finish = finish
+        self._button = button
+
+    def accept(self):
+        pass
+
+    def button(self):
+        return self._button
+
+    def isFinish(self):
+        return self._finish
+
+    def lastScenePos(self):
+        return self._last_scene_pos
+
+    def scenePos(self):
+        return self._scene_pos
+
+
+class TestViewBoxWithCursor(TestBase):
+    def setUp(self):
+        super().setUp()
+
+        self.viewbox = ViewBoxWithCursor(plot=None)
+        self.viewbox.resize(200, 100)
+        self.viewbox.setRange(xRange=(0, 10), yRange=(0, 1), padding=0)
+
+    def test_CursorMode_ZoomDrag_FinalCursorPosition(self):
+        """
+        Test Scope: Validate that the final cursor position of a zoom drag is mapped
+            with the view range from before the zoom.
+        Events:
+            - Set cursor mode and start an X zoom
+            - Drag with the left button; the zoom finished slot changes the X range
+        Evaluate:
+            - Evaluate that sigCursorMoved was emitted once, before the zoom was applied,
+             and that the cursor was placed at the drag end point.
+            - Evaluate that no cursor move is left pending after the drag.
+        """
+        positions = []
+
+        def cursor_moved(event):
+            positions.append(self.viewbox.mapSceneToView(event.scenePos()).x())
+
+        def zoom_finished(zoom):
+            start, end, _ = zoom
+            self.viewbox.setXRange(*sorted((start.x(), end.x())), padding=0)
+
+        self.viewbox.sigCursorMoved.connect(cursor_moved)
+        self.viewbox.sigZoomFinished.connect(zoom_finished)
+
+        self.viewbox.setMouseMode(ViewBoxWithCursor.CursorMode)
+        start = QtCore.QPointF(20, 50)
+        middle = QtCore.QPointF(60, 50)
+        end = QtCore.QPointF(100, 50)
+        expected = self.viewbox.mapSceneToView(end).x()
+
+        self.viewbox.zoom = ViewBoxWithCursor.X_zoom
+        self.viewbox.zoom_start = self.viewbox.mapSceneToView(start)
+
+        # Event
+        self.viewbox.mouseDragEvent(DragEvent(middle, start))
+        self.viewbox.mouseDragEvent(DragEvent(end, middle, finish=True))
+
+        # Evaluate
+        self.assertEqual(1, len(positions))
+        self.assertAlmostEqual(expected, positions[0])
+        self.assertNotAlmostEqual(expected, self.viewbox.mapSceneToView(end).x())
+
+        self.processEvents()
+        self.assertEqual(1, len(positions))
+
+    def set_child_transform(self, transform):
+        self.viewbox.childGroup.setTransform(transform)
+        self.viewbox._invalidate_inverse_transform()
+
+    def test_MapDeltaToView_MatchesInvertedTransform(self):
+        """
+        Test Scope: Validate that mapping a scene delta through the inverted linear part
+            of the child transform gives the same result as mapping it through the fully
+            inverted transform and subtracting the mapped origin.
+        Events:
+            - Set sheared child transforms, with normal and with inverted axes
+            - Map scene deltas to view deltas
+        Evaluate:
+            - Evaluate that the results match fn.invertQTransform
+        """
+        transforms = (
+            QtGui.QTransform(2.0, 0.3, -0.5, 1.5, 10.0, 20.0),
+            QtGui.QTransform(-2.0, 0.3, -0.5, -1.5, 10.0, 20.0),
+            QtGui.QTransform.fromScale(20.0, -100.0).translate(5.0, -1.0),
+        )
+        deltas = ((5.0, 3.0), (-7.5, 0.0), (0.0, -12.25))
+
+        for transform in transforms:
+            self.set_child_transform(transform)
+            inverse = fn.invertQTransform(transform)
+            origin = inverse.map(QtCore.QPointF(0, 0))
+
+            for dx, dy in deltas:
+                with self.subTest(transform=transform, delta=(dx, dy)):
+                    expected = inverse.map(QtCore.QPointF(dx, dy)) - origin
+                    x, y = self.viewbox._map_delta_to_view(dx, dy)
+
+                    self.assertAlmostEqual(expected.x(), x)
+                    self.assertAlmostEqual(expected.y(), y)
+
+    def test_MapDeltaToView_SingularTransform(self):
+        """
+        Test Scope: Validate that a singular child transform does not raise when
+            a drag delta is mapped.
+        Events:
+            - Set a child transform with zero X scale
+            - Map a scene delta to a view delta
+        Evaluate:
+            - Evaluate that the view delta is zero
+        """
+        self.set_child_transform(QtGui.QTransform.fromScale(0.0, 2.0))
+
+        self.assertEqual((0.0, 0.0), self.viewbox._map_delta_to_view(5.0, 3.0))